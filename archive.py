@@ -0,0 +1,170 @@
+import os
+import numpy as np
+from model import Model
+
+# how each archived model was created
+KINDS = ['initial', 'elite', 'crossover', 'mutation']
+
+# file header: magic, population size, parameter count
+MAGIC = b'SNAKELIN'
+HEADER_SIZE = 24
+
+
+class LineageArchive():
+
+    def __init__(self, path, population_size, parameter_count):
+        '''Initialize: create a new archive file or append to an existing one.'''
+
+        self.path = path
+        self.population_size = population_size
+        self.parameter_count = parameter_count
+
+        # one fixed size record per archived model
+        self.dtype = np.dtype([
+            ('generation', np.int64),
+            ('index', np.int64),
+            ('fitness', np.float64),
+            ('kind', np.int64),
+            ('parent_1', np.int64),
+            ('parent_2', np.int64),
+            ('parameters', np.float64, (parameter_count,)),
+        ])
+
+        # new file: write header
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as file:
+                file.write(MAGIC)
+                file.write(np.array([population_size, parameter_count], dtype=np.int64).tobytes())
+
+        # existing file: check header matches
+        else:
+            with open(path, 'rb') as file:
+                header = file.read(HEADER_SIZE)
+            sizes = np.frombuffer(header[len(MAGIC):], dtype=np.int64)
+            if header[:len(MAGIC)] != MAGIC or sizes[0] != population_size or sizes[1] != parameter_count:
+                raise ValueError(f"{path} is not a lineage archive for population size {population_size} and {parameter_count} parameters")
+
+        # read only map of records, remapped when file grows
+        self.records = None
+
+
+    def __len__(self):
+        '''Number of archived models.'''
+        return (os.path.getsize(self.path) - HEADER_SIZE) // self.dtype.itemsize
+
+
+    def generations(self):
+        '''Number of archived generations.'''
+        return len(self) // self.population_size
+
+
+    def truncate(self, generations):
+        '''Drop generations after the first few, e.g. those archived after the checkpoint being resumed.'''
+
+        if generations > self.generations():
+            raise ValueError(f"{self.path} holds {self.generations()} generations, cannot resume at generation {generations}")
+
+        # unmap before shrinking file
+        self.records = None
+        os.truncate(self.path, HEADER_SIZE + generations * self.population_size * self.dtype.itemsize)
+
+
+    def append_generation(self, population, generation):
+        '''Append a generation of evaluated models, setting their archive ids.'''
+
+        # generations stored in order: id = generation * population_size + index
+        if generation != self.generations():
+            raise ValueError(f"expected generation {self.generations()}, got {generation}")
+        if len(population) != self.population_size:
+            raise ValueError(f"expected {self.population_size} models, got {len(population)}")
+
+        records = np.zeros(self.population_size, dtype=self.dtype)
+        for index, model in enumerate(population):
+
+            # how model was created: carried over if already archived
+            uid = getattr(model, 'uid', None)
+            parents = getattr(model, 'parents', None)
+            if uid is not None:
+                kind, parent_1, parent_2 = 'elite', uid, None
+            elif parents is not None:
+                kind, parent_1, parent_2 = parents
+            else:
+                kind, parent_1, parent_2 = 'initial', None, None
+
+            records[index]['generation'] = generation
+            records[index]['index'] = index
+            records[index]['fitness'] = model.fitness
+            records[index]['kind'] = KINDS.index(kind)
+            records[index]['parent_1'] = -1 if parent_1 is None else parent_1
+            records[index]['parent_2'] = -1 if parent_2 is None else parent_2
+            records[index]['parameters'] = model.get_parameters()
+
+            # archive id
+            model.uid = generation * self.population_size + index
+
+        # append to file: nothing kept in memory
+        with open(self.path, 'ab') as file:
+            file.write(records.tobytes())
+
+
+    def record(self, generation, index):
+        '''Random access to the record of a model.'''
+
+        uid = generation * self.population_size + index
+
+        # map records, remapping if file has grown
+        if self.records is None or uid >= len(self.records):
+            if uid >= len(self):
+                raise IndexError(f"generation {generation} index {index} not archived")
+            self.records = np.memmap(self.path, dtype=self.dtype, mode='r', offset=HEADER_SIZE, shape=(len(self),))
+
+        return self.records[uid]
+
+
+    def load_model(self, generation, index, widths=[16, 8], output_width=4, encoder='raw'):
+        '''Recreate an archived model.'''
+
+        record = self.record(generation, index)
+
+        model = Model(widths, output_width=output_width, encoder=encoder)
+        model.set_parameters(record['parameters'])
+        model.fitness = float(record['fitness'])
+        model.uid = generation * self.population_size + index
+
+        return model
+
+
+    def parents(self, generation, index):
+        '''How a model was created and (generation, index) of its parents.'''
+
+        record = self.record(generation, index)
+
+        parents = []
+        for uid in (record['parent_1'], record['parent_2']):
+            if uid >= 0:
+                parents.append((int(uid) // self.population_size, int(uid) % self.population_size))
+
+        return KINDS[record['kind']], parents
+
+
+    def lineage(self, generation, index, max_depth=None):
+        '''Ancestors of a model as (generation, index, kind) tuples, nearest first.'''
+
+        ancestors = []
+        frontier = [(generation, index)]
+        seen = set(frontier)
+        depth = 0
+
+        # breadth first over parents
+        while frontier and (max_depth is None or depth < max_depth):
+            next_frontier = []
+            for position in frontier:
+                for parent in self.parents(*position)[1]:
+                    if parent not in seen:
+                        seen.add(parent)
+                        ancestors.append((*parent, self.parents(*parent)[0]))
+                        next_frontier.append(parent)
+            frontier = next_frontier
+            depth += 1
+
+        return ancestors
@@ -0,0 +1,236 @@
+import numpy as np
+from snake import RandomStream
+
+# ray directions (dh, dw), clockwise from up: same order as encoders
+DIRECTIONS = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+
+# head movement for each move: 0 = up, 1 = right, 2 = down, 3 = left
+MOVE_DH = np.array([-1, 0, 1, 0])
+MOVE_DW = np.array([0, 1, 0, -1])
+
+
+def held_out_seeds(n_games=10000, start=1000):
+    '''Fixed seeds never used in training (training draws seeds from 0 to 999).'''
+    return np.arange(start, start + n_games)
+
+
+def ray_tables(grid_height, grid_width):
+    '''Cells along each ray from each cell (padded with sentinel cell), and distance to wall.'''
+
+    cells = grid_height * grid_width
+    max_length = max(grid_height, grid_width)
+
+    rays = np.full((len(DIRECTIONS), cells, max_length), cells, dtype=np.int64)
+    wall = np.zeros((len(DIRECTIONS), cells), dtype=np.int64)
+
+    for k, (dh, dw) in enumerate(DIRECTIONS):
+        for cell in range(cells):
+            height, width = divmod(cell, grid_width)
+            j = 0
+            while 0 <= height < grid_height and 0 <= width < grid_width:
+                rays[k, cell, j] = height * grid_width + width
+                height += dh
+                width += dw
+                j += 1
+            wall[k, cell] = j
+
+    return rays, wall
+
+
+def first_index(hits):
+    '''Index of first True along last axis, -1 if none.'''
+    return np.where(hits.any(axis=-1), hits.argmax(axis=-1), -1)
+
+
+def encode_batch(encoder, distances, heading):
+    '''Batched version of the named encoder from raw (games, rays, 3) distances and heading of each game.'''
+
+    n = len(distances)
+
+    if encoder == 'raw':
+        x = distances
+
+    elif encoder == 'reciprocal':
+        x = np.where(distances >= 0, 1 / np.maximum(distances + 1, 1), 0)
+
+    elif encoder == 'binary':
+        x = np.stack([distances[:, :, 0] == 1, distances[:, :, 1] >= 0, distances[:, :, 2] >= 0], axis=2)
+
+    elif encoder == 'relative':
+        rotation = (np.arange(len(DIRECTIONS))[None, :] + 2 * heading[:, None]) % len(DIRECTIONS)
+        x = distances[np.arange(n)[:, None], rotation]
+        one_hot = np.zeros((n, 4))
+        one_hot[np.arange(n), heading] = 1
+        return np.concatenate([x.reshape(n, -1), one_hot], axis=1).astype(np.float32)
+
+    else:
+        raise ValueError(f"unknown encoder '{encoder}'")
+
+    return x.reshape(n, -1).astype(np.float32)
+
+
+def play_games(model, seeds, grid_height=16, grid_width=16, initial_length=3, move_limit=300, record=False):
+    '''Play one game per seed with the same rules as Snake, one batched forward pass per step: return food eaten and steps (and per game traces if record).'''
+
+    encoder = getattr(model, 'encoder', 'raw')
+
+    n = len(seeds)
+    cells = grid_height * grid_width
+    rays, wall = ray_tables(grid_height, grid_width)
+
+    # body of each game: ring buffer of cells from head, occupancy with a never occupied sentinel cell
+    ring = np.zeros((n, cells), dtype=np.int64)
+    start = np.zeros(n, dtype=np.int64)
+    length = np.full(n, initial_length, dtype=np.int64)
+    occupied = np.zeros((n, cells + 1), dtype=bool)
+
+    # game state
+    food = np.zeros(n, dtype=np.int64)
+    eaten = np.zeros(n, dtype=np.int64)
+    steps = np.zeros(n, dtype=np.int64)
+    moves_remaining = np.full(n, move_limit, dtype=np.int64)
+    alive = np.ones(n, dtype=bool)
+
+    # random streams: same values as Snake, not cached
+    streams = [RandomStream(seed, block_size=16) for seed in seeds]
+    stream_index = np.zeros(n, dtype=np.int64)
+
+    def random_integer(g, high):
+        '''Next random integer in [0, high) from the stream of game g.'''
+        value = streams[g].integer(stream_index[g], high)
+        stream_index[g] += 1
+        return value
+
+    def spawn_food(g):
+        '''Spawn food for game g on a cell not in its body, False if none empty.'''
+        if length[g] == cells:
+            return False
+        while True:
+            cell = random_integer(g, grid_height) * grid_width + random_integer(g, grid_width)
+            if not occupied[g, cell]:
+                food[g] = cell
+                return True
+
+    # per game observations, moves and food positions of each step
+    traces = [{'observations': [], 'moves': [], 'food': []} for g in range(n)] if record else None
+
+    # spawn snakes and food
+    for g in range(n):
+        head_height = random_integer(g, grid_height)
+        head_width = random_integer(g, grid_width)
+        dw = -1 if head_width > grid_width / 2 else 1
+        for i in range(initial_length):
+            ring[g, i] = head_height * grid_width + head_width + i * dw
+            occupied[g, ring[g, i]] = True
+        spawn_food(g)
+
+    # step all living games together
+    while alive.any():
+
+        games = np.flatnonzero(alive)
+        steps[games] += 1
+
+        # no moves remaining: die
+        expired = moves_remaining[games] == 0
+        alive[games[expired]] = False
+        games = games[~expired]
+        if len(games) == 0:
+            break
+
+        # observation: distance to wall, food and body (excluding head) along each ray
+        heads = ring[games, start[games]]
+        ray_cells = rays[:, heads, :]
+        food_hits = ray_cells == food[games][None, :, None]
+        body_hits = occupied[games[None, :, None], ray_cells]
+        body_hits[:, :, 0] = False
+        distances = np.stack([wall[:, heads], first_index(food_hits), first_index(body_hits)], axis=2).transpose(1, 0, 2)
+
+        # heading from neck to head: 0 = up, 1 = right, 2 = down, 3 = left (up if no neck)
+        heading = np.zeros(len(games), dtype=np.int64)
+        if encoder == 'relative':
+            necks = ring[games, (start[games] + 1) % cells]
+            dh = heads // grid_width - necks // grid_width
+            dw = heads % grid_width - necks % grid_width
+            heading = np.select([dw == 1, dh == 1, dw == -1], [1, 2, 3], 0)
+            heading[length[games] < 2] = 0
+
+        x = encode_batch(encoder, distances, heading)
+
+        # single forward pass for all games
+        moves = model.move_batch(x)
+
+        # record step
+        if record:
+            for i, g in enumerate(games):
+                traces[g]['observations'].append(x[i].copy())
+                traces[g]['moves'].append(int(moves[i]))
+                traces[g]['food'].append(divmod(int(food[g]), grid_width))
+
+        # new head positions
+        head_height, head_width = np.divmod(heads, grid_width)
+        new_height = head_height + MOVE_DH[moves]
+        new_width = head_width + MOVE_DW[moves]
+        in_bounds = (new_height >= 0) & (new_height < grid_height) & (new_width >= 0) & (new_width < grid_width)
+        new_cell = np.where(in_bounds, new_height * grid_width + new_width, cells)
+        eat = new_cell == food[games]
+
+        # eating: reset moves, spawn new food before head added, die if no space
+        for i in np.flatnonzero(eat):
+            g = games[i]
+            moves_remaining[g] = move_limit
+            eaten[g] += 1
+            if not spawn_food(g):
+                alive[g] = False
+
+        # not eating: use a move, remove tail
+        grow = games[~eat]
+        moves_remaining[grow] -= 1
+        tails = ring[grow, (start[grow] + length[grow] - 1) % cells]
+        occupied[grow, tails] = False
+        length[grow] -= 1
+
+        # collisions with walls, then with body
+        dead = ~in_bounds | occupied[games, new_cell]
+        alive[games[dead]] = False
+
+        # no collisions: add head
+        keep = alive[games]
+        survivors = games[keep]
+        start[survivors] = (start[survivors] - 1) % cells
+        ring[survivors, start[survivors]] = new_cell[keep]
+        occupied[survivors, new_cell[keep]] = True
+        length[survivors] += 1
+
+    if record:
+        return eaten, steps, traces
+
+    return eaten, steps
+
+
+def summarize(scores, z=1.96):
+    '''Mean, quantiles and normal approximation confidence interval of scores.'''
+
+    mean = np.mean(scores)
+    std = np.std(scores, ddof=1) if len(scores) > 1 else 0.0
+    half_width = z * std / np.sqrt(len(scores))
+    quantiles = np.quantile(scores, [0.05, 0.25, 0.5, 0.75, 0.95])
+
+    return {
+        'games': len(scores),
+        'mean': mean,
+        'std': std,
+        'quantiles': dict(zip([5, 25, 50, 75, 95], quantiles)),
+        'confidence_interval': (mean - half_width, mean + half_width),
+    }
+
+
+def evaluate_champion(model, n_games=10000, grid_height=16, grid_width=16, initial_length=3, move_limit=300):
+    '''Score a model on the held-out seed set.'''
+    eaten = play_games(model, held_out_seeds(n_games), grid_height, grid_width, initial_length, move_limit)[0]
+    return summarize(eaten)
+
+
+def evaluate_top(population, k=1, n_games=10000, grid_height=16, grid_width=16, initial_length=3, move_limit=300):
+    '''Score the k fittest models of a population on the held-out seed set.'''
+    fittest = sorted(population.population, key=lambda md: md.fitness, reverse=True)[:k]
+    return [(model, evaluate_champion(model, n_games, grid_height, grid_width, initial_length, move_limit)) for model in fittest]
@@ -0,0 +1,95 @@
+import numpy as np
+
+# ray directions (dh, dw), clockwise from up
+DIRECTIONS = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+
+
+class RawEncoder():
+    '''Distance to wall, food and body along each ray: -1 if not seen.'''
+
+    width = 3 * len(DIRECTIONS)
+
+    def encode(self, snake, out):
+        '''Fill out with observation of snake.'''
+        for i, (dh, dw) in enumerate(DIRECTIONS):
+            out[3*i], out[3*i + 1], out[3*i + 2] = snake.look(dh, dw)
+        return out
+
+
+class ReciprocalEncoder():
+    '''Reciprocal distance 1 / (distance + 1) to wall, food and body along each ray: 0 if not seen.'''
+
+    width = 3 * len(DIRECTIONS)
+
+    def encode(self, snake, out):
+        '''Fill out with observation of snake.'''
+        for i, (dh, dw) in enumerate(DIRECTIONS):
+            for j, dist in enumerate(snake.look(dh, dw)):
+                out[3*i + j] = 1 / (dist + 1) if dist >= 0 else 0
+        return out
+
+
+class BinaryEncoder():
+    '''Binary vision along each ray: wall adjacent, food seen, body seen.'''
+
+    width = 3 * len(DIRECTIONS)
+
+    def encode(self, snake, out):
+        '''Fill out with observation of snake.'''
+        for i, (dh, dw) in enumerate(DIRECTIONS):
+            wall_dist, food_dist, body_dist = snake.look(dh, dw)
+            out[3*i] = wall_dist == 1
+            out[3*i + 1] = food_dist >= 0
+            out[3*i + 2] = body_dist >= 0
+        return out
+
+
+class RelativeEncoder():
+    '''Raw distances along rays starting from the heading of the snake, then one hot heading.'''
+
+    width = 3 * len(DIRECTIONS) + 4
+
+    def encode(self, snake, out):
+        '''Fill out with observation of snake.'''
+
+        # heading: 0 = up, 1 = right, 2 = down, 3 = left (up if no neck)
+        heading = 0
+        if len(snake.body) > 1:
+            dh = snake.body[0][0] - snake.body[1][0]
+            dw = snake.body[0][1] - snake.body[1][1]
+            heading = DIRECTIONS.index((dh, dw)) // 2
+
+        # rays rotated so first ray is straight ahead
+        for i in range(len(DIRECTIONS)):
+            dh, dw = DIRECTIONS[(i + 2 * heading) % len(DIRECTIONS)]
+            out[3*i], out[3*i + 1], out[3*i + 2] = snake.look(dh, dw)
+
+        # one hot heading
+        out[3 * len(DIRECTIONS):] = 0
+        out[3 * len(DIRECTIONS) + heading] = 1
+
+        return out
+
+
+# encoders by name: stateless, shared by all snakes
+ENCODERS = {
+    'raw': RawEncoder(),
+    'reciprocal': ReciprocalEncoder(),
+    'binary': BinaryEncoder(),
+    'relative': RelativeEncoder(),
+}
+
+
+def get_encoder(name):
+    '''Get encoder by name.'''
+    if name not in ENCODERS:
+        raise ValueError(f"unknown encoder '{name}', expected one of {list(ENCODERS)}")
+    return ENCODERS[name]
+
+
+def new_buffer(name, n=None):
+    '''Preallocated float32 observation buffer for an encoder: one row per snake if n given.'''
+    width = get_encoder(name).width
+    if n is None:
+        return np.zeros(width, dtype=np.float32)
+    return np.zeros((n, width), dtype=np.float32)
@@ -0,0 +1,189 @@
+'''Differential equivalence harness: run an alternative engine step by step against the reference Snake.'''
+
+import numpy as np
+from model import Model
+from snake import Snake
+
+
+class Divergence():
+
+    def __init__(self, case, step, field, expected, actual, function='compare_game(engine, {case!r})'):
+        '''Initialize.'''
+        self.case = case
+        self.step = step
+        self.field = field
+        self.expected = expected
+        self.actual = actual
+        self.function = function
+
+    def reproducer(self):
+        '''Code reproducing the divergence.'''
+        return f"{self.function.format(case=self.case)}  # diverges at step {self.step} on '{self.field}'"
+
+    def __str__(self):
+        return (
+            f"Divergence at step {self.step} on '{self.field}':\n"
+            f"  expected: {self.expected!r}\n"
+            f"  actual:   {self.actual!r}\n"
+            f"  reproduce: {self.reproducer()}"
+        )
+
+
+def reference_engine(model, grid_height, grid_width, initial_length, seed, move_limit):
+    '''Reference engine: the Snake implementation itself.'''
+    return Snake(model, grid_height, grid_width, initial_length, seed, move_limit)
+
+
+def make_model(genome_seed, widths=[16, 8], encoder='raw'):
+    '''Create a model with parameters drawn from a given seed.'''
+    model = Model(widths, encoder=encoder)
+    model.initialize_parameters(np.random.default_rng(genome_seed))
+    return model
+
+
+def generate_cases(number, seed=0, grid_sizes=(4, 6, 8, 12, 16), lengths=(2, 3, 4, 5), move_limits=(20, 100, 300)):
+    '''Generate random cases, cheapest first so the first divergence found is a small reproducer.'''
+
+    generator = np.random.default_rng(seed)
+
+    cases = []
+    for i in range(number):
+
+        # grid and a length which fits in it
+        grid_height = int(generator.choice(grid_sizes))
+        grid_width = int(generator.choice(grid_sizes))
+        valid_lengths = [length for length in lengths if length <= grid_width // 2]
+
+        cases.append({
+            'genome_seed': int(generator.integers(0, 2**31)),
+            'grid_height': grid_height,
+            'grid_width': grid_width,
+            'initial_length': int(generator.choice(valid_lengths)),
+            'seed': int(generator.integers(0, 2**31)),
+            'move_limit': int(generator.choice(move_limits))
+        })
+
+    # cheapest first
+    cases.sort(key=lambda case: (case['grid_height'] * case['grid_width'], case['move_limit']))
+
+    return cases
+
+
+def compare_game(engine, case, max_steps=100000):
+    '''Play one case with the reference and the engine, return the first Divergence or None.'''
+
+    # separate models: engines may keep state on their model
+    reference = reference_engine(
+        make_model(case['genome_seed']),
+        case['grid_height'],
+        case['grid_width'],
+        case['initial_length'],
+        case['seed'],
+        case['move_limit']
+    )
+    alternative = engine(
+        make_model(case['genome_seed']),
+        case['grid_height'],
+        case['grid_width'],
+        case['initial_length'],
+        case['seed'],
+        case['move_limit']
+    )
+
+    for step in range(max_steps):
+
+        # compare game state: death step and score included
+        for field in ('body', 'food', 'dead', 'eaten'):
+            expected = getattr(reference, field)
+            actual = getattr(alternative, field)
+            if field == 'body':
+                expected = [tuple(pos) for pos in expected]
+                actual = [tuple(pos) for pos in actual]
+            if expected != actual:
+                return Divergence(case, step, field, expected, actual)
+
+        # game over for both
+        if reference.dead:
+            return None
+
+        # compare observation vector
+        expected = reference.state_to_input()
+        actual = alternative.state_to_input()
+        if not np.array_equal(expected, actual):
+            return Divergence(case, step, 'observation', expected.tolist(), np.asarray(actual).tolist())
+
+        # move both, compare move
+        reference.move_snake()
+        alternative.move_snake()
+        if reference.move != alternative.move:
+            return Divergence(case, step, 'move', reference.move, alternative.move)
+
+    return None
+
+
+def run_harness(engine, number=200, seed=0, **kwargs):
+    '''Compare engine with the reference over many random cases, return the first Divergence or None.'''
+
+    for case in generate_cases(number, seed, **kwargs):
+        divergence = compare_game(engine, case)
+        if divergence is not None:
+            return divergence
+
+    return None
+
+
+def compare_batch(play, model, seeds, grid_height, grid_width, initial_length=3, move_limit=300):
+    '''Play seeds with a batched engine and the reference, return the first step whose food, observation, move, score or death step differs, or None.'''
+
+    # batched engine: food eaten, steps and per step trace of each seed
+    eaten, steps, traces = play(model, seeds, grid_height, grid_width, initial_length, move_limit, record=True)
+
+    for i, seed in enumerate(seeds):
+
+        case = {
+            'seeds': [int(seed)],
+            'grid_height': grid_height,
+            'grid_width': grid_width,
+            'initial_length': initial_length,
+            'move_limit': move_limit
+        }
+        function = 'compare_batch(play, model, **{case!r})'
+        trace = traces[i]
+
+        # reference game step by step: observations only made while moves remain
+        reference = reference_engine(model, grid_height, grid_width, initial_length, seed, move_limit)
+        step = 0
+        observed = 0
+        while not reference.dead:
+
+            if reference.moves_remaining > 0:
+
+                # state before the move
+                if observed >= len(trace['moves']):
+                    return Divergence(case, step, 'dead', False, True, function)
+                if tuple(reference.food) != tuple(trace['food'][observed]):
+                    return Divergence(case, step, 'food', reference.food, trace['food'][observed], function)
+                expected = reference.state_to_input()
+                actual = trace['observations'][observed]
+                if not np.array_equal(expected, actual):
+                    return Divergence(case, step, 'observation', expected.tolist(), actual.tolist(), function)
+
+                # move
+                reference.move_snake()
+                if reference.move != trace['moves'][observed]:
+                    return Divergence(case, step, 'move', reference.move, trace['moves'][observed], function)
+                observed += 1
+
+            else:
+                reference.move_snake()
+
+            step += 1
+
+        if observed != len(trace['moves']):
+            return Divergence(case, step, 'dead', True, False, function)
+        if reference.eaten != eaten[i]:
+            return Divergence(case, step, 'eaten', reference.eaten, int(eaten[i]), function)
+        if step != steps[i]:
+            return Divergence(case, step, 'death step', step, int(steps[i]), function)
+
+    return None
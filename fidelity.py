@@ -0,0 +1,43 @@
+class FidelitySchedule():
+
+    def __init__(self, levels=None, thresholds=None):
+        '''Initialize.'''
+
+        # evaluation settings from cheapest to full cost
+        if levels is None:
+            levels = [
+                {'grid_height': 8, 'grid_width': 8, 'move_limit': 100, 'trials': 1},
+                {'grid_height': 12, 'grid_width': 12, 'move_limit': 200, 'trials': 2},
+                {'grid_height': 16, 'grid_width': 16, 'move_limit': 300, 'trials': 3},
+            ]
+        self.levels = levels
+
+        # best normalized score at a level needed to promote to the next
+        if thresholds is None:
+            thresholds = [0.05 for i in range(len(levels) - 1)]
+        self.thresholds = thresholds
+
+        # current level
+        self.level = 0
+
+    def current(self):
+        '''Settings of the current level.'''
+        return self.levels[self.level]
+
+    def at_full(self):
+        '''Whether the current level is full cost.'''
+        return self.level == len(self.levels) - 1
+
+    def update(self, best_score):
+        '''Promote to the next level if best normalized score reaches its threshold.'''
+
+        if not self.at_full() and best_score >= self.thresholds[self.level]:
+            self.level += 1
+            return True
+
+        return False
+
+
+def normalize_score(eaten, grid_height, grid_width, initial_length):
+    '''Food eaten as a fraction of the food available on the grid: promotion thresholds hold on any grid size, but move limit and grid size still change how hard food is to reach, so scores are not comparable across levels.'''
+    return eaten / (grid_height * grid_width - initial_length)
@@ -1,14 +1,21 @@
 import numpy as np
+from collections import OrderedDict
+from encoders import get_encoder
 
 rng = np.random.default_rng()
 
 class Model():
 
-    def __init__(self, widths=[16, 8], input_width=24, output_width=4):
+    def __init__(self, widths=[16, 8], input_width=None, output_width=4, cache_size=0, encoder='raw'):
         '''Initialize'''
         self.weights = []
         self.biases = []
         self.activations = []
+
+        # observation encoder: sets input width unless given
+        self.encoder = encoder
+        if input_width is None:
+            input_width = get_encoder(encoder).width
         self.layer_widths = [input_width] + widths + [output_width]
         self.depth = len(self.layer_widths)
 
@@ -16,6 +23,36 @@ class Model():
         self.information = []
         self.fitness = None
 
+        # lineage: archive id, and (kind, parent id, parent id) set when created by evolution
+        self.uid = None
+        self.parents = None
+
+        # policy cache: observation bytes to direction, least recently used evicted (0 = off)
+        self.cache_size = cache_size
+        self.clear_cache()
+
+    def clear_cache(self):
+        '''Empty policy cache and reset its statistics: call whenever parameters change.'''
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __getstate__(self):
+        '''Copy and pickle without cached moves: children get new parameters, and workers need not receive them.'''
+        state = self.__dict__.copy()
+        state['cache'] = OrderedDict()
+        return state
+
+    def cache_statistics(self):
+        '''Policy cache hits, misses, hit rate and size.'''
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / lookups if lookups else 0.0,
+            'size': len(self.cache)
+        }
+
     def softmax(self, x):
         '''Softmax activation function.'''
         max_val = np.max(x)
@@ -34,8 +71,12 @@ class Model():
         '''ReLu activation function'''
         return np.maximum(x, 0)
     
-    def initialize_parameters(self):
-        '''Initialize model parameters with uniformly distributed values.'''
+    def initialize_parameters(self, generator=None):
+        '''Initialize model parameters with uniformly distributed values, optionally from a given generator.'''
+
+        # default to module generator
+        if generator is None:
+            generator = rng
 
         # for each layer
         for i in range(1, self.depth):
@@ -45,15 +86,57 @@ class Model():
             bias_size = self.layer_widths[i]
 
             # uniformly distributed values
-            self.weights.append(rng.uniform(-1, 1, size=weight_size))
-            self.biases.append(rng.uniform(-1, 1, size=bias_size))
+            self.weights.append(generator.uniform(-1, 1, size=weight_size))
+            self.biases.append(generator.uniform(-1, 1, size=bias_size))
+
+        # activation functions
+        self.initialize_activations()
 
-            # activation function: sigmoid for final layer, else relu
+        # new parameters: cached moves invalid
+        self.clear_cache()
+
+    def initialize_activations(self):
+        '''Set activation functions: sigmoid for final layer, else relu.'''
+        self.activations = []
+        for i in range(1, self.depth):
             if i == self.depth - 1:
                 self.activations.append(self.sigmoid)
             else:
                 self.activations.append(self.relu)
 
+    def parameter_count(self):
+        '''Number of weights and biases.'''
+        return sum([self.layer_widths[i] * (self.layer_widths[i - 1] + 1) for i in range(1, self.depth)])
+
+    def get_parameters(self):
+        '''Pack weights and biases into a single vector.'''
+        return np.concatenate([param.ravel() for param in self.weights] + [param.ravel() for param in self.biases])
+
+    def set_parameters(self, parameters):
+        '''Unpack weights and biases from a single vector.'''
+
+        self.weights = []
+        self.biases = []
+        position = 0
+
+        # weight matrices
+        for i in range(1, self.depth):
+            m, n = self.layer_widths[i], self.layer_widths[i - 1]
+            self.weights.append(np.array(parameters[position:position + m * n], dtype=np.float64).reshape((m, n)))
+            position += m * n
+
+        # biases
+        for i in range(1, self.depth):
+            m = self.layer_widths[i]
+            self.biases.append(np.array(parameters[position:position + m], dtype=np.float64))
+            position += m
+
+        # activation functions
+        self.initialize_activations()
+
+        # new parameters: cached moves invalid
+        self.clear_cache()
+
     def forward(self, x):
         '''Forward pass over model with input x.'''
 
@@ -64,13 +147,43 @@ class Model():
 
         return x
     
+    def forward_batch(self, x):
+        '''Forward pass over model with one input per row of x.'''
+
+        # pass x through network layers
+        for i in range(self.depth - 1):
+            x = x @ self.weights[i].T + self.biases[i]
+            x = self.activations[i](x)
+
+        return x
+
+    def move_batch(self, x):
+        '''Compute snake movement for one input per row of x.'''
+        return np.argmax(self.forward_batch(x), axis=1)
+
     def move(self, x):
         '''Compute snake movement.'''
 
+        # repeated observation: use cached direction
+        if self.cache_size:
+            key = x.tobytes()
+            direction = self.cache.get(key)
+            if direction is not None:
+                self.cache.move_to_end(key)
+                self.cache_hits += 1
+                return direction
+            self.cache_misses += 1
+
         # get raw output
         output = self.forward(x)
 
         # take argmax
         direction = int(np.argmax(output))
 
+        # store, evicting least recently used
+        if self.cache_size:
+            self.cache[key] = direction
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
         return direction
@@ -0,0 +1,271 @@
+import os
+import numpy as np
+from snake import SnakePool
+
+# header: magic, version, max grid size, frame capacity, statistics capacity, frames written, statistics written
+MAGIC = 0x534e414b454d4f4e
+VERSION = 1
+HEADER_LENGTH = 8
+
+# frame cell values
+EMPTY = 0
+BODY = 1
+FOOD = 2
+HEAD = 3
+
+
+def frame_dtype(max_grid):
+    '''Record of one frame of a game.'''
+    return np.dtype([
+        ('sequence', np.int64),
+        ('generation', np.int64),
+        ('step', np.int64),
+        ('eaten', np.int64),
+        ('dead', np.int64),
+        ('grid_height', np.int64),
+        ('grid_width', np.int64),
+        ('cells', np.uint8, (max_grid * max_grid,)),
+    ])
+
+
+# record of one generation's statistics
+STATISTICS_DTYPE = np.dtype([
+    ('sequence', np.int64),
+    ('generation', np.int64),
+    ('best', np.float64),
+    ('mean', np.float64),
+    ('simulated_steps', np.int64),
+])
+
+
+def map_buffer(path, mode, max_grid=None, frame_capacity=None, statistics_capacity=None):
+    '''Map header, frame ring and statistics ring of a monitor file.'''
+
+    # existing file: read sizes from header
+    if mode == 'r':
+        header = np.memmap(path, dtype=np.int64, mode='r', shape=(HEADER_LENGTH,))
+        if header[0] != MAGIC or header[1] != VERSION:
+            raise ValueError(f"{path} is not a monitor buffer")
+        max_grid, frame_capacity, statistics_capacity = int(header[2]), int(header[3]), int(header[4])
+
+    # new file: size it
+    else:
+        dtype = frame_dtype(max_grid)
+        size = HEADER_LENGTH * 8 + frame_capacity * dtype.itemsize + statistics_capacity * STATISTICS_DTYPE.itemsize
+        with open(path, 'wb') as file:
+            file.truncate(size)
+        header = np.memmap(path, dtype=np.int64, mode='r+', shape=(HEADER_LENGTH,))
+
+    dtype = frame_dtype(max_grid)
+    offset = HEADER_LENGTH * 8
+    frames = np.memmap(path, dtype=dtype, mode=mode if mode == 'r' else 'r+', offset=offset, shape=(frame_capacity,))
+    offset += frame_capacity * dtype.itemsize
+    statistics = np.memmap(path, dtype=STATISTICS_DTYPE, mode=mode if mode == 'r' else 'r+', offset=offset, shape=(statistics_capacity,))
+
+    return header, frames, statistics, max_grid
+
+
+class MonitorPublisher():
+
+    def __init__(self, path, max_grid=32, frame_capacity=4096, statistics_capacity=1024):
+        '''Initialize: create ring buffer file, single writer.'''
+
+        self.path = path
+
+        # build new file beside the old one: attached readers keep mapping the old file
+        temporary_path = path + '.tmp'
+        self.header, self.frames, self.statistics, self.max_grid = map_buffer(temporary_path, 'w+', max_grid, frame_capacity, statistics_capacity)
+
+        # counts written
+        self.frame_count = 0
+        self.statistics_count = 0
+
+        # header written last: readers reject file until complete
+        self.header[2:5] = [max_grid, frame_capacity, statistics_capacity]
+        self.header[5:7] = 0
+        self.header[1] = VERSION
+        self.header[0] = MAGIC
+        self.header.flush()
+
+        # swap into place: old file never truncated under a reader, readers reattach on the new one
+        os.replace(temporary_path, path)
+
+        # snakes for replaying games
+        self.pool = SnakePool()
+
+    def write(self, ring, count, values):
+        '''Write a record to the next ring slot: sequence odd while writing, even once complete.'''
+        slot = ring[count % len(ring)]
+        slot['sequence'] = 2 * count + 1
+        for field, value in values.items():
+            slot[field] = value
+        slot['sequence'] = 2 * count + 2
+
+    def publish_frame(self, snake, generation, step):
+        '''Publish current state of a snake game.'''
+
+        # grid cells
+        cells = np.zeros(self.max_grid * self.max_grid, dtype=np.uint8)
+        for height, width in snake.body:
+            cells[height * snake.grid_width + width] = BODY
+        cells[snake.food[0] * snake.grid_width + snake.food[1]] = FOOD
+        cells[snake.body[0][0] * snake.grid_width + snake.body[0][1]] = HEAD
+
+        self.write(self.frames, self.frame_count, {
+            'generation': generation,
+            'step': step,
+            'eaten': snake.eaten,
+            'dead': snake.dead,
+            'grid_height': snake.grid_height,
+            'grid_width': snake.grid_width,
+            'cells': cells,
+        })
+
+        # count published last: readers never see a partial frame as newest
+        self.frame_count += 1
+        self.header[5] = self.frame_count
+
+    def publish_game(self, model, trial_info, generation):
+        '''Replay a trial of a model, publishing every frame.'''
+
+        # grid too large for buffer: skip
+        if max(trial_info['grid_height'], trial_info['grid_width']) > self.max_grid:
+            return
+
+        snake = self.pool.acquire(
+            model,
+            trial_info['grid_height'],
+            trial_info['grid_width'],
+            trial_info['initial_length'],
+            trial_info['seed'],
+            trial_info['move_limit']
+        )
+
+        # publish every step until dead
+        step = 0
+        self.publish_frame(snake, generation, step)
+        while not snake.dead:
+            state = snake.snapshot()
+            snake.move_snake()
+            step += 1
+
+            # death can leave the body mid-move: publish last complete position marked dead
+            if snake.dead:
+                snake.restore(state)
+                snake.dead = True
+
+            self.publish_frame(snake, generation, step)
+
+        self.pool.release(snake)
+
+    def publish_statistics(self, population):
+        '''Publish fitness statistics of a population.'''
+
+        fitness = [model.fitness for model in population.population]
+        self.write(self.statistics, self.statistics_count, {
+            'generation': population.generation,
+            'best': max(fitness),
+            'mean': np.mean(fitness),
+            'simulated_steps': population.simulated_steps,
+        })
+
+        self.statistics_count += 1
+        self.header[6] = self.statistics_count
+
+    def close(self):
+        '''Flush buffer to file.'''
+        self.header.flush()
+
+
+class MonitorReader():
+
+    def __init__(self, path):
+        '''Initialize: attach to ring buffer file of a running trainer.'''
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+
+        # file identity: a restarted trainer replaces the file
+        self.inode = os.stat(path).st_ino
+        self.header, self.frames, self.statistics, self.max_grid = map_buffer(path, 'r')
+
+        # next records to read
+        self.frame_position = 0
+        self.statistics_position = 0
+
+    def replaced(self):
+        '''Whether the trainer has replaced the file since attaching: reattach to read the new one.'''
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return False
+
+    def read(self, ring, count):
+        '''Copy record count from ring, None if it has been overwritten or is being written.'''
+        slot = ring[count % len(ring)]
+        sequence = slot['sequence']
+        record = slot.copy()
+        if sequence != 2 * count + 2 or slot['sequence'] != sequence:
+            return None
+        return record
+
+    def next_frame(self):
+        '''Next unread frame, skipping ahead if the writer has lapped the reader, None if no new frame.'''
+
+        written = int(self.header[5])
+
+        # skip frames already overwritten
+        self.frame_position = max(self.frame_position, written - len(self.frames) + 1)
+
+        while self.frame_position < written:
+            record = self.read(self.frames, self.frame_position)
+            self.frame_position += 1
+            if record is not None:
+                return record
+
+        return None
+
+    def latest_frame(self):
+        '''Newest frame, None if none.'''
+        self.frame_position = max(self.frame_position, int(self.header[5]) - 1)
+        return self.next_frame()
+
+    def new_statistics(self):
+        '''Statistics records written since last call.'''
+
+        written = int(self.header[6])
+        self.statistics_position = max(self.statistics_position, written - len(self.statistics) + 1)
+
+        records = []
+        while self.statistics_position < written:
+            record = self.read(self.statistics, self.statistics_position)
+            self.statistics_position += 1
+            if record is not None:
+                records.append(record)
+
+        return records
+
+    def close(self):
+        '''Detach from buffer.'''
+        self.header = self.frames = self.statistics = None
+
+
+class FrameSnake():
+
+    def __init__(self, frame):
+        '''Initialize: snake-like view of a frame for drawing with Display.'''
+
+        self.grid_height = int(frame['grid_height'])
+        self.grid_width = int(frame['grid_width'])
+        self.eaten = int(frame['eaten'])
+        self.dead = bool(frame['dead'])
+        self.tail_old = None
+
+        # positions from cells: head first
+        cells = frame['cells'][:self.grid_height * self.grid_width]
+        head = [divmod(int(i), self.grid_width) for i in np.flatnonzero(cells == HEAD)]
+        body = [divmod(int(i), self.grid_width) for i in np.flatnonzero(cells == BODY)]
+        food = [divmod(int(i), self.grid_width) for i in np.flatnonzero(cells == FOOD)]
+        self.body = head + body
+        self.food = food[0] if food else self.body[0]
@@ -1,20 +1,82 @@
 import numpy as np
+import bisect
+import concurrent.futures
 import copy
+import pickle
 from model import Model
-from snake import Snake
-from display import Display
+from snake import SnakePool, clear_stream_cache
+from fidelity import normalize_score
 
 rng = np.random.default_rng()
 
+# snakes reused across models and generations: one pool per process
+snake_pool = SnakePool()
+
+
+def evaluate_model(model, seed_list, length_list, grid_height=16, grid_width=16, move_limit=300):
+    '''Run trials to compute fitness of a single model: module level so worker processes can call it.'''
+
+    # clear fitness information
+    model.information = []
+    model.fitness = 0
+
+    # run multiple trials
+    for seed, initial_length in zip(seed_list, length_list):
+
+        # get a snake with trial settings
+        snake = snake_pool.acquire(model, grid_height, grid_width, initial_length, seed, move_limit)
+
+        # run until dead, counting steps simulated
+        steps = 0
+        while not snake.dead:
+            snake.move_snake()
+            steps += 1
+
+        # trial information
+        trial_info = {
+            'seed': seed,
+            'initial_length': initial_length,
+            'grid_width': grid_width,
+            'grid_height': grid_height,
+            'move_limit': move_limit,
+            'steps': steps,
+            'fitness': snake.eaten,
+            'score': normalize_score(snake.eaten, grid_height, grid_width, initial_length)
+        }
+
+        # return snake for reuse
+        snake_pool.release(snake)
+
+        # store
+        model.information.append(trial_info)
+
+    # compute overall fitness (will later be sum over several trials)
+    model.fitness = np.mean([trial_info['fitness'] for trial_info in model.information])
+
+    return model
+
+
 class Population():
 
-    def __init__(self, population_size, mutation_rate=0.05):
+    def __init__(self, population_size, mutation_rate=0.05, fidelity=None, cache_size=0, encoder='raw'):
         '''Initialize.'''
         self.population_size = population_size
         self.population = []
         self.mutation_rate = mutation_rate
         self.generation = 0
 
+        # optional multi-fidelity evaluation schedule
+        self.fidelity = fidelity
+
+        # total snake steps simulated
+        self.simulated_steps = 0
+
+        # policy cache size of each model (0 = off)
+        self.cache_size = cache_size
+
+        # observation encoder of each model
+        self.encoder = encoder
+
 
     def initialize(self):
         '''Initialize a new population.'''
@@ -27,7 +89,7 @@ class Population():
 
         # initialize new models
         for i in range(self.population_size):
-            model = Model()
+            model = Model(cache_size=self.cache_size, encoder=self.encoder)
             model.initialize_parameters()
             self.population.append(model)
 
@@ -75,6 +137,7 @@ class Population():
         # set to mutated parameters
         model_mut.weights = weights_mut
         model_mut.biases = biases_mut
+        model_mut.clear_cache()
 
         # return mutated model
         return model_mut
@@ -130,55 +193,80 @@ class Population():
         # set to crossover parameters
         model_cross.weights = weights_cross
         model_cross.biases = biases_cross
+        model_cross.clear_cache()
 
         # return crossed model
         return model_cross
     
 
-    def compute_fitness(self, trials=3):
-        '''Run trials to compute fitness of each model in population.'''
+    def evaluate_models(self, models, seed_list, length_list, grid_height, grid_width, move_limit=300, executor=None, chunksize=1):
+        '''Evaluate models in this process or in workers, return evaluated models.'''
 
-        # trials
-        seed_list = rng.integers(0, 1000, size=trials)
-        length_list = [3 for i in range(trials)]
+        # no executor: evaluate each model in this process
+        if executor is None:
+            evaluated = [evaluate_model(model, seed_list, length_list, grid_height, grid_width, move_limit) for model in models]
+
+        # executor: evaluate in workers, evaluated copies returned
+        else:
+            n = len(models)
+            evaluated = list(executor.map(
+                evaluate_model,
+                models,
+                [seed_list] * n,
+                [length_list] * n,
+                [grid_height] * n,
+                [grid_width] * n,
+                [move_limit] * n,
+                chunksize=chunksize
+            ))
 
-        # for each model in population
-        for model in self.population:
+        # count steps simulated
+        for model in evaluated:
+            self.simulated_steps += sum([trial_info['steps'] for trial_info in model.information])
 
-            # clear fitness information
-            model.information = []
-            model.fitness = 0
+        return evaluated
 
-            # run multiple trials
-            for i in range(trials):
 
-                # setup trial: seed and initial length
-                seed = seed_list[i]
-                initial_length = length_list[i]
-                grid_height = 16
-                grid_width = 16
+    def compute_fitness(self, trials=3, grid_height=16, grid_width=16, executor=None, chunksize=1):
+        '''Run trials to compute fitness of each model in population, optionally over a pool of worker processes.'''
 
-                # create a snake with trial settings
-                snake = Snake(model, grid_height, grid_width, initial_length, seed)
+        # streams of previous generation seeds no longer needed
+        clear_stream_cache()
 
-                # run until dead
-                while not snake.dead:
-                    snake.move_snake()
+        # multi-fidelity: settings from schedule
+        if self.fidelity is not None:
+            self.compute_fitness_fidelity(executor, chunksize)
+            return
 
-                # trial information
-                trial_info = {
-                    'seed': seed,
-                    'initial_length': initial_length,
-                    'grid_width': grid_width,
-                    'grid_height': grid_height,
-                    'fitness': snake.eaten
-                }
+        # trials
+        seed_list = rng.integers(0, 1000, size=trials)
+        length_list = [3 for i in range(trials)]
 
-                # store
-                model.information.append(trial_info)
+        # evaluate
+        self.population = self.evaluate_models(self.population, seed_list, length_list, grid_height, grid_width, executor=executor, chunksize=chunksize)
+
+
+    def compute_fitness_fidelity(self, executor=None, chunksize=1):
+        '''Compute fitness at the current schedule level, promoting the schedule as fitness rises.'''
+
+        # evaluate population at current level: every model on the same games, so selection stays consistent
+        settings = self.fidelity.current()
+        seed_list = rng.integers(0, 1000, size=settings['trials'])
+        length_list = [3 for i in range(settings['trials'])]
+        self.population = self.evaluate_models(
+            self.population,
+            seed_list,
+            length_list,
+            settings['grid_height'],
+            settings['grid_width'],
+            settings['move_limit'],
+            executor=executor,
+            chunksize=chunksize
+        )
 
-            # compute overall fitness (will later be sum over several trials)
-            model.fitness = np.mean([trial_info['fitness'] for trial_info in model.information])
+        # promote on best score normalized by grid size: thresholds hold on any level
+        best_score = max([np.mean([trial_info['score'] for trial_info in model.information]) for model in self.population])
+        self.fidelity.update(best_score)
 
 
     def print_population_statistics(self):
@@ -188,6 +276,11 @@ class Population():
         print(f"Generation {self.generation}:")
         print(f"Best fitness: {max([model.fitness for model in self.population])}")
         print(f"Average fitness: {np.mean([model.fitness for model in self.population])}")
+        if self.fidelity is not None:
+            print(f"Fidelity level: {self.fidelity.level}")
+        print(f"Simulated steps: {self.simulated_steps}")
+        if self.cache_size:
+            print(f"Policy cache hit rate: {np.mean([model.cache_statistics()['hit_rate'] for model in self.population])}")
         print("-"*20)
 
     
@@ -200,15 +293,19 @@ class Population():
         # find trial with highest fitness
         best_trial = max(fittest_model.information, key=lambda trial_info: trial_info['fitness'])
 
-        # create a snake game with given settings
-        snake = Snake(
+        # get a snake game with given settings
+        snake = snake_pool.acquire(
             fittest_model,
             best_trial['grid_height'],
             best_trial['grid_width'],
             best_trial['initial_length'],
-            best_trial['seed']
+            best_trial['seed'],
+            best_trial['move_limit']
         )
 
+        # import display lazily: training never needs pygame
+        from display import Display
+
         # create a display
         display = Display(
             best_trial['grid_height'],
@@ -233,8 +330,39 @@ class Population():
             # handle events
             display.event_handler()
 
-        # close display
+        # close display, return snake for reuse
         display.quit()
+        snake_pool.release(snake)
+
+
+    def make_child(self, selected):
+        '''Create a new model by crossover or mutation of randomly chosen selected models.'''
+
+        # randomly select to crossover or mutate
+        u = rng.uniform()
+
+        if u < 0.5:
+
+            # choose random selected models
+            model_1, model_2 = rng.choice(selected, size=2)
+
+            # crossover
+            child = self.crossover(model_1, model_2)
+            child.parents = ('crossover', model_1.uid, model_2.uid)
+
+        else:
+
+            # choose random selected model
+            model = rng.choice(selected, size=1)[0]
+
+            # mutate
+            child = self.mutation(model)
+            child.parents = ('mutation', model.uid, None)
+
+        # new model: not yet archived
+        child.uid = None
+
+        return child
 
 
     def evolve_population(self, selected_number=10):
@@ -246,39 +374,127 @@ class Population():
         # select highest fitness models
         selected = self.population[:selected_number]
 
-        # setup new population
-        new_population = selected
+        # setup new population: a copy, so children are only bred from selected models
+        new_population = list(selected)
 
         # for remaining models: crossover or mutate selected models
         for i in range(self.population_size - selected_number):
+            new_population.append(self.make_child(selected))
 
-            # randomly select to crossover or mutate
-            u = rng.uniform()
-
-            if u < 0.5:
-
-                # choose random selected models
-                model_1, model_2 = rng.choice(selected, size=2)
-
-                # crossover
-                model_cross = self.crossover(model_1, model_2)
-
-                # add to new population
-                new_population.append(model_cross)
+        # update population
+        self.population = new_population
 
-            else:
+        # update generations
+        self.generation += 1
 
-                # choose random selected model
-                model = rng.choice(selected, size=1)[0]
 
-                # mutate
-                model_mut = self.mutation(model)
+    def evolve_steady_state(self, evaluations, trials=3, grid_height=16, grid_width=16, selected_number=10, executor=None, in_flight=1, on_generation=None):
+        '''Evolve without a generation barrier: insert each evaluated model into the fitness ordered population and dispatch a new child.'''
 
-                # add to new population
-                new_population.append(model_mut)
+        # every model compared on the same trials: no schedule level to promote
+        if self.fidelity is not None:
+            raise ValueError("steady-state evolution does not support a multi-fidelity schedule")
 
-        # update population
-        self.population = new_population
+        # models still to evaluate for the first time, population refilled in fitness order
+        pending = list(self.population)
+        self.population = []
 
-        # update generations
-        self.generation += 1
\ No newline at end of file
+        # trials: redrawn every population_size evaluations (generation equivalent)
+        trial_settings = {
+            'seed_list': rng.integers(0, 1000, size=trials),
+            'length_list': [3 for i in range(trials)],
+            'grid_height': grid_height,
+            'grid_width': grid_width
+        }
+        clear_stream_cache()
+
+        # evaluations started and completed
+        counts = {'started': 0, 'completed': 0}
+
+        # elites scored on earlier trials, re-evaluated on the current ones
+        stale = []
+
+        def next_model():
+            '''Next unevaluated initial model, else a stale elite, else a child of the current elites.'''
+            counts['started'] += 1
+            if pending:
+                return pending.pop()
+
+            # stale elite: taken out until re-evaluated, always leaving a model to breed from
+            while stale and len(self.population) > 1:
+                model = stale.pop()
+                if model in self.population:
+                    self.population.remove(model)
+                    return model
+
+            return self.make_child(self.population[:selected_number])
+
+        def complete(model):
+            '''Insert evaluated model by fitness, report generation equivalents.'''
+
+            # count steps simulated
+            self.simulated_steps += sum([trial_info['steps'] for trial_info in model.information])
+
+            # insert ahead of equal fitness, dropping weakest (oldest on ties) if over size
+            index = bisect.bisect_left(self.population, -model.fitness, key=lambda md: -md.fitness)
+            self.population.insert(index, model)
+            del self.population[self.population_size:]
+            counts['completed'] += 1
+
+            # generation equivalent: report, redraw trials, re-evaluate elites on them
+            if counts['completed'] % self.population_size == 0:
+                self.generation += 1
+                if on_generation is not None:
+                    on_generation(self)
+                trial_settings['seed_list'] = rng.integers(0, 1000, size=trials)
+                clear_stream_cache()
+                stale[:] = self.population[:selected_number]
+
+        # no executor: evaluate and insert one model at a time
+        if executor is None:
+            while counts['started'] < evaluations:
+                complete(evaluate_model(next_model(), **trial_settings))
+            return
+
+        # keep workers busy: fill queue of running evaluations, initial models only as no elites exist yet
+        running = set()
+        for i in range(min(in_flight, evaluations, len(pending))):
+            running.add(executor.submit(evaluate_model, next_model(), **trial_settings))
+
+        # as evaluations complete: insert and top the queue back up to in_flight
+        while running:
+            done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                complete(future.result())
+            while counts['started'] < evaluations and len(running) < in_flight:
+                running.add(executor.submit(evaluate_model, next_model(), **trial_settings))
+
+
+    def save_checkpoint(self, path):
+        '''Save population models and settings to a file.'''
+
+        checkpoint = {
+            'population_size': self.population_size,
+            'mutation_rate': self.mutation_rate,
+            'generation': self.generation,
+            'population': self.population,
+            'fidelity': self.fidelity,
+            'simulated_steps': self.simulated_steps
+        }
+
+        with open(path, 'wb') as file:
+            pickle.dump(checkpoint, file)
+
+
+    def load_checkpoint(self, path):
+        '''Load population models and settings from a file.'''
+
+        with open(path, 'rb') as file:
+            checkpoint = pickle.load(file)
+
+        self.population_size = checkpoint['population_size']
+        self.mutation_rate = checkpoint['mutation_rate']
+        self.generation = checkpoint['generation']
+        self.population = checkpoint['population']
+        self.fidelity = checkpoint.get('fidelity')
+        self.simulated_steps = checkpoint.get('simulated_steps', 0)
\ No newline at end of file
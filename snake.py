@@ -1,28 +1,113 @@
 import numpy as np
+from encoders import get_encoder
+
+# pre-drawn random streams shared by all snakes with the same seed
+stream_cache = {}
+stream_cache_size = 64
+
+
+class RandomStream():
+
+    def __init__(self, seed, block_size=1024):
+        '''Initialize.'''
+
+        # generator only used to refill the buffer in bulk
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+
+        # buffer of uniform values in [0, 1)
+        self.values = []
+        self.refill()
+
+    def refill(self):
+        '''Append a new block of uniform values to the buffer.'''
+        self.values.extend(self.rng.random(self.block_size).tolist())
+
+    def integer(self, index, high):
+        '''Integer in [0, high) from the value at position index of the stream.'''
+
+        # extend buffer until index is drawn
+        while index >= len(self.values):
+            self.refill()
+
+        return int(self.values[index] * high)
+
+
+def get_stream(seed):
+    '''Get the shared random stream of a seed, creating it if needed.'''
+
+    # no seed: private, unrepeatable stream
+    if seed is None:
+        return RandomStream(None)
+
+    seed = int(seed)
+
+    # create stream, evicting oldest if cache full
+    if seed not in stream_cache:
+        if len(stream_cache) >= stream_cache_size:
+            stream_cache.pop(next(iter(stream_cache)))
+        stream_cache[seed] = RandomStream(seed)
+
+    return stream_cache[seed]
+
+
+def clear_stream_cache():
+    '''Remove all cached random streams.'''
+    stream_cache.clear()
+
 
 class Snake():
 
-    def __init__(self, model, grid_height, grid_width, initial_length, seed, move_limit=300):
+    def __init__(self, model, grid_height, grid_width, initial_length, seed, move_limit=300, encoder=None):
         '''Initialize'''
 
         # model controlling snake
         self.model = model
 
+        # body buffer: reused by every reset
+        self.body = []
+
+        # observation encoder name (None = encoder of model) and buffer it fills
+        self.encoder_name = encoder
+        self.encoder = None
+        self.observation = None
+
+        # start game
+        self.reset(seed, initial_length, grid_height, grid_width, move_limit)
+
+
+    def reset(self, seed, initial_length=None, grid_height=None, grid_width=None, move_limit=None, model=None, encoder=None):
+        '''Start a new game in place, reusing buffers: settings not given are kept.'''
+
+        # model controlling snake
+        if model is not None:
+            self.model = model
+
+        # observation encoder
+        if encoder is not None:
+            self.encoder_name = encoder
+        self.select_encoder()
+
         # setup information
-        self.grid_height = grid_height
-        self.grid_width = grid_width
-        self.initial_length = initial_length
+        if grid_height is not None:
+            self.grid_height = grid_height
+        if grid_width is not None:
+            self.grid_width = grid_width
+        if initial_length is not None:
+            self.initial_length = initial_length
         self.seed = seed
-        
+
         # move limit / currently remaining: die without food
-        self.move_limit = move_limit
-        self.moves_remaining = move_limit
+        if move_limit is not None:
+            self.move_limit = move_limit
+        self.moves_remaining = self.move_limit
 
         # food counter
         self.eaten = 0
 
-        # random generator
-        self.rng = np.random.default_rng(seed)
+        # random stream shared with other snakes on this seed, and position in it
+        self.stream = get_stream(seed)
+        self.stream_index = 0
 
         # spawn snake
         self.spawn_snake()
@@ -33,16 +118,68 @@ class Snake():
         # old tail position for display
         self.tail_old = None
 
+        # last move made
+        self.move = None
+
         # snake status
         self.dead = False
 
 
+    def select_encoder(self):
+        '''Select observation encoder by name, reallocating the buffer only if its width changes.'''
+
+        name = self.encoder_name
+        if name is None:
+            name = getattr(self.model, 'encoder', 'raw')
+        self.encoder = get_encoder(name)
+
+        if self.observation is None or self.observation.shape[0] != self.encoder.width:
+            self.observation = np.zeros(self.encoder.width, dtype=np.float32)
+
+
+    def snapshot(self):
+        '''Copy of the full game state and settings, to restore later even after a reset to another game.'''
+        return (
+            self.model,
+            self.encoder_name,
+            self.grid_height,
+            self.grid_width,
+            self.initial_length,
+            self.move_limit,
+            self.seed,
+            list(self.body),
+            self.food,
+            self.moves_remaining,
+            self.eaten,
+            self.stream,
+            self.stream_index,
+            self.tail_old,
+            self.move,
+            self.dead,
+        )
+
+
+    def restore(self, snapshot):
+        '''Return to a game state from snapshot.'''
+        (self.model, self.encoder_name, self.grid_height, self.grid_width, self.initial_length, self.move_limit, self.seed,
+         body, self.food, self.moves_remaining, self.eaten, self.stream, self.stream_index, self.tail_old, self.move, self.dead) = snapshot
+        self.body[:] = body
+        self.select_encoder()
+
+
+    def random_integer(self, high):
+        '''Next random integer in [0, high) from the seed stream.'''
+        value = self.stream.integer(self.stream_index, high)
+        self.stream_index += 1
+        return value
+
+
     def spawn_snake(self):
         '''Generate random locations for position of snake.'''
 
         # head position
-        head_height = self.rng.integers(0, self.grid_height)
-        head_width = self.rng.integers(0, self.grid_width)
+        head_height = self.random_integer(self.grid_height)
+        head_width = self.random_integer(self.grid_width)
 
         # direction
         if head_height > self.grid_height / 2:
@@ -54,8 +191,9 @@ class Snake():
         else:
             dw = 1
 
-        # create body
-        self.body = [(head_height, head_width + i*dw) for i in range(self.initial_length)]
+        # create body in existing buffer
+        self.body.clear()
+        self.body.extend([(head_height, head_width + i*dw) for i in range(self.initial_length)])
 
 
     def spawn_food(self):
@@ -67,8 +205,8 @@ class Snake():
 
         while True:
 
-            food_height = self.rng.integers(0, self.grid_height)
-            food_width = self.rng.integers(0, self.grid_width)
+            food_height = self.random_integer(self.grid_height)
+            food_width = self.random_integer(self.grid_width)
 
             if (food_height, food_width) not in self.body:
                 self.food = (food_height, food_width)
@@ -115,22 +253,15 @@ class Snake():
         return wall_dist, food_dist, body_dist
     
     
-    def state_to_input(self):
-        '''Compute model input vector from current gamestate.'''
+    def state_to_input(self, out=None):
+        '''Compute model input vector from current gamestate: filled into out, else the snake observation buffer.'''
 
-        # collect input
-        x = np.array([
-            *self.look(-1, 0),
-            *self.look(-1, 1),
-            *self.look(0, 1),
-            *self.look(1, 1),
-            *self.look(1, 0),
-            *self.look(1, -1),
-            *self.look(0, -1),
-            *self.look(-1, -1),
-        ])
+        # preallocated buffer
+        if out is None:
+            out = self.observation
 
-        return x
+        # fill with encoder
+        return self.encoder.encode(self, out)
 
 
     def move_snake(self):
@@ -146,6 +277,7 @@ class Snake():
 
         # pass to model
         move = self.model.move(x)
+        self.move = move
 
         # old head position
         head_height_old = self.body[0][0]
@@ -209,4 +341,30 @@ class Snake():
         # store old tail position for display
         self.tail_old = tail_old
 
-        return None
\ No newline at end of file
+        return None
+
+
+class SnakePool():
+
+    def __init__(self):
+        '''Initialize.'''
+
+        # snakes free for reuse
+        self.free = []
+
+    def acquire(self, model, grid_height, grid_width, initial_length, seed, move_limit=300):
+        '''Get a snake with a new game: reset a free snake, else create one.'''
+
+        if self.free:
+            snake = self.free.pop()
+            snake.reset(seed, initial_length, grid_height, grid_width, move_limit, model)
+            return snake
+
+        return Snake(model, grid_height, grid_width, initial_length, seed, move_limit)
+
+    def release(self, snake):
+        '''Return a snake to the pool.'''
+
+        # drop model reference so it can be freed
+        snake.model = None
+        self.free.append(snake)
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import numpy as np
+from archive import LineageArchive
+from population import Population
+from train import parse_arguments
+
+
+def run_archived(path, population_size=12, generations=3, selected_number=4):
+    '''Run generational evolution archiving every generation, return population and archive.'''
+
+    pop = Population(population_size)
+    pop.initialize()
+    archive = LineageArchive(path, population_size, pop.population[0].parameter_count())
+
+    for gen in range(generations):
+        pop.compute_fitness(trials=1, grid_height=8, grid_width=8)
+        archive.append_generation(pop.population, pop.generation)
+        pop.evolve_population(selected_number=selected_number)
+
+    return pop, archive
+
+
+def test_append_and_record():
+    '''One record per model, random access by generation and index.'''
+    with tempfile.TemporaryDirectory() as directory:
+        pop, archive = run_archived(os.path.join(directory, 'lineage'))
+        assert len(archive) == 36
+        assert archive.generations() == 3
+        record = archive.record(1, 5)
+        assert (record['generation'], record['index']) == (1, 5)
+
+        # out of order generation rejected
+        try:
+            archive.append_generation(pop.population, 5)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+
+def test_load_model():
+    '''Archived model recreated with the same parameters and fitness.'''
+    with tempfile.TemporaryDirectory() as directory:
+        pop, archive = run_archived(os.path.join(directory, 'lineage'), generations=1)
+        model = pop.population[0]
+        loaded = archive.load_model(0, 0)
+        assert np.array_equal(loaded.get_parameters(), model.get_parameters())
+        assert loaded.fitness == model.fitness
+        assert loaded.uid == 0
+
+
+def test_parents():
+    '''Elites carried over from the previous generation, every child bred from archived elites.'''
+    with tempfile.TemporaryDirectory() as directory:
+        pop, archive = run_archived(os.path.join(directory, 'lineage'))
+        assert all(archive.parents(0, index) == ('initial', []) for index in range(12))
+
+        for generation in (1, 2):
+            elites = set()
+            for index in range(12):
+                kind, parents = archive.parents(generation, index)
+                if kind == 'elite':
+                    assert len(parents) == 1 and parents[0][0] == generation - 1
+                    elites.add(parents[0])
+            assert len(elites) == 4
+
+            for index in range(12):
+                kind, parents = archive.parents(generation, index)
+                if kind == 'crossover':
+                    assert len(parents) == 2
+                if kind == 'mutation':
+                    assert len(parents) == 1
+                if kind in ('crossover', 'mutation'):
+                    assert set(parents) <= elites
+
+
+def test_lineage():
+    '''Ancestors reach back to the initial generation.'''
+    with tempfile.TemporaryDirectory() as directory:
+        pop, archive = run_archived(os.path.join(directory, 'lineage'))
+        for index in range(12):
+            ancestors = archive.lineage(2, index)
+            assert ancestors
+            assert ancestors[-1][0] == 0 and ancestors[-1][2] == 'initial'
+            assert archive.lineage(2, index, max_depth=1) == [ancestor for ancestor in ancestors if ancestor[0] == 1]
+
+
+def test_truncate():
+    '''Generations after the resumed checkpoint dropped, appending continues from there.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'lineage')
+        pop, archive = run_archived(path)
+        archive.record(2, 0)
+        archive.truncate(1)
+        assert archive.generations() == 1
+        try:
+            archive.record(2, 0)
+        except IndexError:
+            pass
+        else:
+            raise AssertionError("expected IndexError")
+
+        # reopened archive appends after the kept generations
+        archive = LineageArchive(path, 12, pop.population[0].parameter_count())
+        pop.compute_fitness(trials=1, grid_height=8, grid_width=8)
+        archive.append_generation(pop.population, 1)
+        assert archive.generations() == 2
+
+
+def test_steady_state_rejected():
+    '''Steady-state breeds from models not yet archived.'''
+    try:
+        parse_arguments(['--archive', 'lineage', '--mode', 'steady-state'])
+    except SystemExit:
+        pass
+    else:
+        raise AssertionError("expected command line error")
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+    print("archive: ok")
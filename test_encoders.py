@@ -0,0 +1,76 @@
+import numpy as np
+from model import Model
+from snake import Snake
+from encoders import new_buffer
+
+# fixed 5 x 7 board: head on top wall heading right, food straight below head
+BODY = [(0, 4), (0, 3), (0, 2)]
+FOOD = (4, 4)
+
+# wall, food, body per ray: up, up-right, right, down-right, down, down-left, left, up-left
+RAW = [1, -1, -1, 1, -1, -1, 3, -1, -1, 3, -1, -1, 5, 4, -1, 5, -1, -1, 5, -1, 1, 1, -1, -1]
+
+
+def board_snake(encoder, body=BODY, food=FOOD):
+    '''Snake on the fixed board using the given encoder.'''
+    snake = Snake(Model(encoder=encoder), 5, 7, len(body), 0)
+    snake.body[:] = body
+    snake.food = food
+    return snake
+
+
+def test_raw():
+    assert board_snake('raw').state_to_input().tolist() == RAW
+
+
+def test_reciprocal():
+    expected = [
+        1/2, 0, 0, 1/2, 0, 0, 1/4, 0, 0, 1/4, 0, 0,
+        1/6, 1/5, 0, 1/6, 0, 0, 1/6, 0, 1/2, 1/2, 0, 0
+    ]
+    assert np.allclose(board_snake('reciprocal').state_to_input(), expected)
+
+
+def test_binary():
+    expected = [
+        1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0,
+        0, 1, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0
+    ]
+    assert board_snake('binary').state_to_input().tolist() == expected
+
+
+def test_relative_heading_right():
+    '''Rays start from right, then one hot heading right.'''
+    expected = RAW[6:] + RAW[:6] + [0, 1, 0, 0]
+    assert board_snake('relative').state_to_input().tolist() == expected
+
+
+def test_relative_heading_down():
+    '''Rays start from down: raw rotated by four rays, then one hot heading down.'''
+    body = [(2, 4), (1, 4), (0, 4)]
+    raw = board_snake('raw', body).state_to_input().tolist()
+    expected = raw[12:] + raw[:12] + [0, 0, 1, 0]
+    assert board_snake('relative', body).state_to_input().tolist() == expected
+
+
+def test_batch_row():
+    '''Filling one row of a batch buffer writes only that row, in place.'''
+    batch = new_buffer('raw', 3)
+    row = board_snake('raw').state_to_input(batch[1])
+    assert np.shares_memory(row, batch)
+    assert batch[1].tolist() == RAW
+    assert not batch[0].any() and not batch[2].any()
+
+
+def test_buffer_reused():
+    '''Observation buffer allocated once per snake.'''
+    snake = board_snake('binary')
+    assert snake.state_to_input() is snake.state_to_input()
+    assert snake.observation.dtype == np.float32
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+    print("encoders: ok")
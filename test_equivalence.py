@@ -0,0 +1,173 @@
+import numpy as np
+from equivalence import run_harness, reference_engine, compare_batch, make_model
+from snake import Snake, SnakePool
+from champion import play_games
+from encoders import ENCODERS
+
+pool = SnakePool()
+
+
+def pooled_engine(model, grid_height, grid_width, initial_length, seed, move_limit):
+    '''Snake reset in place after playing a different game.'''
+    snake = pool.acquire(model, 6, 7, 2, seed + 1, 10)
+    while not snake.dead:
+        snake.move_snake()
+    pool.release(snake)
+    return pool.acquire(model, grid_height, grid_width, initial_length, seed, move_limit)
+
+
+def restored_engine(model, grid_height, grid_width, initial_length, seed, move_limit):
+    '''Snake restored to its initial snapshot after playing on.'''
+    snake = reference_engine(model, grid_height, grid_width, initial_length, seed, move_limit)
+    snapshot = snake.snapshot()
+    for i in range(20):
+        if not snake.dead:
+            snake.move_snake()
+    snake.restore(snapshot)
+    return snake
+
+
+def restored_after_reset_engine(model, grid_height, grid_width, initial_length, seed, move_limit):
+    '''Snake restored to its initial snapshot after a reset to another game, model and encoder.'''
+    snake = reference_engine(model, grid_height, grid_width, initial_length, seed, move_limit)
+    snapshot = snake.snapshot()
+    snake.reset(seed + 1, 2, 6, 7, 10, make_model(0, encoder='relative'))
+    snake.move_snake()
+    snake.restore(snapshot)
+    return snake
+
+
+def cached_engine(model, grid_height, grid_width, initial_length, seed, move_limit):
+    '''Snake whose model uses a small policy cache, so evictions happen.'''
+    model.cache_size = 8
+    return reference_engine(model, grid_height, grid_width, initial_length, seed, move_limit)
+
+
+# engines to check against the reference Snake
+engines = {
+    'reference': reference_engine,
+    'pooled': pooled_engine,
+    'restored': restored_engine,
+    'restored after reset': restored_after_reset_engine,
+    'cached': cached_engine,
+}
+
+
+def check_engine(name):
+    '''Engine plays every case exactly as the reference.'''
+    divergence = run_harness(engines[name], number=200)
+    assert divergence is None, f"{name}: {divergence}"
+
+
+def test_reference():
+    check_engine('reference')
+
+
+def test_pooled():
+    check_engine('pooled')
+
+
+def test_restored():
+    check_engine('restored')
+
+
+def test_restored_after_reset():
+    check_engine('restored after reset')
+
+
+def test_cached():
+    check_engine('cached')
+
+
+def shifted_food_engine(model, grid_height, grid_width, initial_length, seed, move_limit):
+    '''Broken on purpose: food one cell right of where the reference puts it.'''
+    snake = reference_engine(model, grid_height, grid_width, initial_length, seed, move_limit)
+    snake.food = (snake.food[0], snake.food[1] + 1)
+    return snake
+
+
+class ShiftedObservationSnake(Snake):
+    '''Broken on purpose: every observation value off by one.'''
+
+    def state_to_input(self, out=None):
+        return super().state_to_input(out) + 1
+
+
+def shifted_observation_engine(model, grid_height, grid_width, initial_length, seed, move_limit):
+    '''Broken on purpose: observation differs, game state does not.'''
+    return ShiftedObservationSnake(model, grid_height, grid_width, initial_length, seed, move_limit)
+
+
+def check_broken_engine(engine, field, step):
+    '''Negative control: harness reports a broken engine on the expected field and step.'''
+    divergence = run_harness(engine, number=20)
+    assert divergence is not None, f"expected divergence on '{field}' at step {step}, got none"
+    assert (divergence.field, divergence.step) == (field, step), f"expected divergence on '{field}' at step {step}, got {divergence}"
+
+
+def test_shifted_food():
+    check_broken_engine(shifted_food_engine, 'food', 0)
+
+
+def test_shifted_observation():
+    check_broken_engine(shifted_observation_engine, 'observation', 0)
+
+
+class GreedyPolicy():
+    '''Heads for visible food, avoiding adjacent walls and body: long games which eat and grow.'''
+
+    encoder = 'raw'
+
+    def move_batch(self, x):
+        rays = np.asarray(x).reshape(len(x), 8, 3)[:, [0, 2, 4, 6], :]
+        food = np.where(rays[:, :, 1] >= 0, 1000 - rays[:, :, 1], 0)
+        blocked = np.where((rays[:, :, 0] == 1) | (rays[:, :, 2] == 1), -1e6, 0)
+        return np.argmax(food + blocked + rays[:, :, 0] + 0.1 * np.arange(4), axis=1)
+
+    def move(self, x):
+        return int(self.move_batch(x[None])[0])
+
+
+def shifted_move_play(model, seeds, grid_height, grid_width, initial_length, move_limit, record=False):
+    '''Broken on purpose: batched games with the first recorded move of each game changed.'''
+    eaten, steps, traces = play_games(model, seeds, grid_height, grid_width, initial_length, move_limit, record=True)
+    for trace in traces:
+        trace['moves'][0] = (trace['moves'][0] + 1) % 4
+    return eaten, steps, traces
+
+
+def test_shifted_batched_move():
+    '''Negative control: batched harness reports the changed move.'''
+    divergence = compare_batch(shifted_move_play, make_model(0), np.arange(5), 8, 8, 3, 100)
+    assert divergence is not None, "expected divergence on 'move' at step 0, got none"
+    assert (divergence.field, divergence.step) == ('move', 0), f"expected divergence on 'move' at step 0, got {divergence}"
+
+
+# grids of batched comparisons: height, width, initial length, move limit
+BATCH_SETTINGS = [(16, 16, 3, 300), (6, 6, 2, 50), (5, 8, 3, 100), (4, 4, 2, 30)]
+
+
+def check_batched(model):
+    '''Batched games of model played exactly as the reference on every grid.'''
+    for grid_height, grid_width, initial_length, move_limit in BATCH_SETTINGS:
+        divergence = compare_batch(play_games, model, np.arange(100), grid_height, grid_width, initial_length, move_limit)
+        assert divergence is None, str(divergence)
+
+
+def test_batched_random_models():
+    '''Random models for each encoder.'''
+    for encoder in ENCODERS:
+        for seed in (0, 1):
+            check_batched(make_model(seed, encoder=encoder))
+
+
+def test_batched_greedy_policy():
+    '''Policy which plays long games which eat and grow.'''
+    check_batched(GreedyPolicy())
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+    print("equivalence: ok")
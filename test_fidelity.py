@@ -0,0 +1,81 @@
+import numpy as np
+from fidelity import FidelitySchedule, normalize_score
+from population import Population
+from train import parse_arguments
+
+# two cheap levels and full cost
+LEVELS = [
+    {'grid_height': 6, 'grid_width': 6, 'move_limit': 20, 'trials': 1},
+    {'grid_height': 8, 'grid_width': 8, 'move_limit': 50, 'trials': 2},
+    {'grid_height': 10, 'grid_width': 10, 'move_limit': 100, 'trials': 3},
+]
+
+
+def test_update():
+    '''Promoted one level at a time when the best score reaches the level threshold, never past full cost.'''
+    schedule = FidelitySchedule(LEVELS, thresholds=[0.1, 0.2])
+    assert not schedule.update(0.05) and schedule.level == 0
+    assert schedule.update(0.1) and schedule.level == 1
+    assert not schedule.update(0.15) and schedule.level == 1
+    assert schedule.update(0.5) and schedule.at_full()
+    assert not schedule.update(1.0) and schedule.level == 2
+
+
+def test_normalize_score():
+    assert normalize_score(0, 8, 8, 3) == 0
+    assert normalize_score(61, 8, 8, 3) == 1
+
+
+def make_population(thresholds):
+    '''Small population on the test schedule.'''
+    pop = Population(4)
+    pop.fidelity = FidelitySchedule(LEVELS, thresholds)
+    pop.initialize()
+    return pop
+
+
+def test_compute_fitness_at_level():
+    '''Every model played on the current level, fitness in food eaten.'''
+    pop = make_population(thresholds=[2, 2])
+    pop.compute_fitness()
+    assert pop.fidelity.level == 0
+    for model in pop.population:
+        assert len(model.information) == 1
+        for trial_info in model.information:
+            assert (trial_info['grid_height'], trial_info['grid_width'], trial_info['move_limit']) == (6, 6, 20)
+        assert model.fitness == np.mean([trial_info['fitness'] for trial_info in model.information])
+
+
+def test_compute_fitness_promotes():
+    '''Zero thresholds: promoted after every generation, next generation played on the next level.'''
+    pop = make_population(thresholds=[0, 0])
+    pop.compute_fitness()
+    assert pop.fidelity.level == 1
+    pop.compute_fitness()
+    assert pop.fidelity.level == 2
+    assert all(len(model.information) == 2 and model.information[0]['grid_height'] == 8 for model in pop.population)
+
+
+def test_steady_state_rejected():
+    '''Steady-state evolution has no schedule to promote.'''
+    pop = make_population(thresholds=[0, 0])
+    try:
+        pop.evolve_steady_state(evaluations=4)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+    try:
+        parse_arguments(['--multi-fidelity', '--mode', 'steady-state'])
+    except SystemExit:
+        pass
+    else:
+        raise AssertionError("expected command line error")
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+    print("fidelity: ok")
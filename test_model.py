@@ -0,0 +1,79 @@
+import copy
+import pickle
+import numpy as np
+from model import Model
+from population import Population
+
+
+def cached_model(cache_size=2):
+    '''Model with a small policy cache.'''
+    model = Model(cache_size=cache_size)
+    model.initialize_parameters(np.random.default_rng(0))
+    return model
+
+
+def observation(i):
+    '''Distinct observation for each i.'''
+    return np.full(24, i, dtype=np.float32)
+
+
+def test_hit_and_miss():
+    '''Same observation twice: one miss then one hit, same move.'''
+    model = cached_model()
+    first = model.move(observation(0))
+    second = model.move(observation(0))
+    assert first == second == model.forward(observation(0)).argmax()
+    assert model.cache_statistics() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 1}
+
+
+def test_least_recently_used_evicted():
+    '''Cache of size 2: third observation evicts the one used least recently.'''
+    model = cached_model(cache_size=2)
+    model.move(observation(0))
+    model.move(observation(1))
+    model.move(observation(0))
+    model.move(observation(2))
+    assert list(model.cache) == [observation(0).tobytes(), observation(2).tobytes()]
+
+    # evicted observation is a miss again
+    model.move(observation(1))
+    assert model.cache_statistics()['misses'] == 4
+
+
+def test_cache_off():
+    '''Cache size 0: nothing stored or counted.'''
+    model = cached_model(cache_size=0)
+    model.move(observation(0))
+    model.move(observation(0))
+    assert model.cache_statistics() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'size': 0}
+
+
+def test_children_start_empty():
+    '''Mutation and crossover children have new parameters: no cached moves or statistics.'''
+    pop = Population(2, cache_size=4)
+    parent_1, parent_2 = cached_model(cache_size=4), cached_model(cache_size=4)
+    for model in (parent_1, parent_2):
+        model.move(observation(0))
+        model.move(observation(0))
+
+    for child in (pop.mutation(parent_1), pop.crossover(parent_1, parent_2)):
+        assert child.cache_statistics() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'size': 0}
+        assert child.cache_size == 4
+    assert parent_1.cache_statistics()['size'] == 1
+
+
+def test_copies_drop_cached_moves():
+    '''Copies and pickles keep cache statistics but not cached moves.'''
+    model = cached_model()
+    model.move(observation(0))
+    model.move(observation(0))
+    for other in (copy.deepcopy(model), pickle.loads(pickle.dumps(model))):
+        assert other.cache_statistics() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 0}
+    assert model.cache_statistics()['size'] == 1
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+    print("model: ok")
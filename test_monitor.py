@@ -0,0 +1,79 @@
+import os
+import tempfile
+from model import Model
+from snake import Snake
+from monitor import MonitorPublisher, MonitorReader
+
+
+def make_buffer(directory, frame_capacity=4):
+    '''Publisher with a small frame ring, and a snake to publish.'''
+    path = os.path.join(directory, 'monitor.bin')
+    publisher = MonitorPublisher(path, max_grid=8, frame_capacity=frame_capacity, statistics_capacity=4)
+    model = Model()
+    model.initialize_parameters()
+    return path, publisher, Snake(model, 8, 8, 3, 0)
+
+
+def test_reader_in_step():
+    '''Reader keeping up sees every frame in order.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path, publisher, snake = make_buffer(directory)
+        reader = MonitorReader(path)
+        for step in range(10):
+            publisher.publish_frame(snake, 0, step)
+            assert reader.next_frame()['step'] == step
+        assert reader.next_frame() is None
+
+
+def test_writer_laps_reader():
+    '''Reader lapped by writer skips overwritten frames, never returns a stale one.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path, publisher, snake = make_buffer(directory, frame_capacity=4)
+        reader = MonitorReader(path)
+        for step in range(10):
+            publisher.publish_frame(snake, 0, step)
+
+        steps = []
+        while (frame := reader.next_frame()) is not None:
+            steps.append(int(frame['step']))
+        assert steps == [7, 8, 9]
+
+
+def test_torn_slot_skipped():
+    '''Slot mid-write (odd sequence) is skipped.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path, publisher, snake = make_buffer(directory)
+        reader = MonitorReader(path)
+        for step in range(3):
+            publisher.publish_frame(snake, 0, step)
+
+        # writer interrupted while writing slot of frame 1
+        publisher.frames[1]['sequence'] = 2 * 1 + 1
+        assert [int(reader.next_frame()['step']), int(reader.next_frame()['step'])] == [0, 2]
+
+
+def test_trainer_restart():
+    '''New publisher replaces the file: old reader keeps working, then reattaches.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path, publisher, snake = make_buffer(directory)
+        publisher.publish_frame(snake, 0, 0)
+        reader = MonitorReader(path)
+        assert not reader.replaced()
+
+        # restart trainer
+        publisher = MonitorPublisher(path, max_grid=8, frame_capacity=4, statistics_capacity=4)
+        assert reader.replaced()
+        assert reader.next_frame()['step'] == 0
+
+        # reattach to new file
+        reader.close()
+        reader = MonitorReader(path)
+        publisher.publish_frame(snake, 1, 5)
+        assert reader.next_frame()['generation'] == 1
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+    print("monitor: ok")
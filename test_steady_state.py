@@ -0,0 +1,72 @@
+from concurrent.futures import ProcessPoolExecutor
+from population import Population
+
+
+def run_steady_state(population_size, workers, generations=2):
+    '''Run steady-state evolution, return population.'''
+
+    pop = Population(population_size)
+    pop.initialize()
+
+    # more evaluations in flight than models in population
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pop.evolve_steady_state(
+            evaluations=generations * population_size,
+            grid_height=8,
+            grid_width=8,
+            selected_number=2,
+            executor=executor,
+            in_flight=2 * workers
+        )
+
+    return pop
+
+
+def test_in_flight_larger_than_population():
+    '''Children only dispatched once an evaluated model exists.'''
+    pop = run_steady_state(population_size=6, workers=4)
+    assert len(pop.population) == 6
+    assert pop.generation == 2
+
+
+def test_sequential():
+    '''No executor: one evaluation at a time.'''
+    pop = Population(6)
+    pop.initialize()
+    pop.evolve_steady_state(evaluations=12, grid_height=8, grid_width=8, selected_number=2)
+    assert len(pop.population) == 6
+    assert pop.generation == 2
+
+
+def test_children_admitted():
+    '''Children replace incumbents of equal fitness: no initial model survives many generations.'''
+    pop = Population(20)
+    pop.initialize()
+    pop.evolve_steady_state(evaluations=200, grid_height=8, grid_width=8, selected_number=5)
+    assert all(model.parents is not None for model in pop.population)
+
+
+def test_elites_reevaluated():
+    '''Elites of each generation equivalent are scored again on the next trials.'''
+    elites = []
+
+    def on_generation(pop):
+        elites.append([(model, [trial_info['seed'] for trial_info in model.information]) for model in pop.population[:3]])
+
+    pop = Population(10)
+    pop.initialize()
+    pop.evolve_steady_state(evaluations=40, grid_height=8, grid_width=8, selected_number=3, on_generation=on_generation)
+
+    for previous, current in zip(elites, elites[1:]):
+        for model, seeds in previous:
+            for current_model, current_seeds in current:
+                if model is current_model:
+                    assert current_seeds != seeds
+
+
+if __name__ == '__main__':
+    test_in_flight_larger_than_population()
+    test_sequential()
+    test_children_admitted()
+    test_elites_reevaluated()
+    print("steady-state: ok")
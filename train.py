@@ -0,0 +1,214 @@
+'''Headless training entry point: python -m train --help'''
+
+import argparse
+import cProfile
+import pstats
+from concurrent.futures import ProcessPoolExecutor
+from population import Population
+from fidelity import FidelitySchedule
+from archive import LineageArchive
+from encoders import ENCODERS
+from monitor import MonitorPublisher
+from champion import evaluate_champion
+
+
+def parse_arguments(argv=None):
+    '''Parse run configuration from the command line.'''
+
+    parser = argparse.ArgumentParser(description="Train snake models with a genetic algorithm.")
+
+    # population settings
+    parser.add_argument('--population-size', type=int, default=100)
+    parser.add_argument('--mutation-rate', type=float, default=0.05)
+    parser.add_argument('--selected-number', type=int, default=5)
+    parser.add_argument('--encoder', choices=list(ENCODERS), default='raw', help="observation encoder of each model")
+    parser.add_argument('--policy-cache', type=int, default=0, help="per-model cache size of observation to move (0 = off)")
+    parser.add_argument('--mode', choices=['generational', 'steady-state'], default='generational', help="steady-state removes the generation barrier")
+
+    # run settings
+    parser.add_argument('--generations', type=int, default=100)
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--grid-size', type=int, default=16)
+    parser.add_argument('--multi-fidelity', action='store_true', help="start on cheap games, promote to full cost as fitness rises")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes for fitness evaluation (1 = in process)")
+
+    # checkpoints
+    parser.add_argument('--checkpoint-every', type=int, default=0, help="generations between checkpoints (0 = never)")
+    parser.add_argument('--checkpoint-path', default='checkpoint.pkl')
+    parser.add_argument('--resume', default=None, help="checkpoint file to resume from")
+    parser.add_argument('--archive', default=None, help="lineage archive file recording every generation")
+
+    # profiling and visualization
+    parser.add_argument('--profile', action='store_true', help="profile the run and print the top functions")
+    parser.add_argument('--display-every', type=int, default=0, help="generations between displays of the fittest model (0 = headless)")
+    parser.add_argument('--champion-games', type=int, default=0, help="held-out games scoring the fittest model each generation (0 = off)")
+    parser.add_argument('--monitor', default=None, help="ring buffer file for a live viewer: python -m viewer FILE")
+
+    args = parser.parse_args(argv)
+
+    # steady-state evaluates every model on the same trials: no schedule to promote
+    if args.multi_fidelity and args.mode == 'steady-state':
+        parser.error("--multi-fidelity is only supported with --mode generational")
+
+    # steady-state breeds from models inserted since the last generation archived: parents without archive ids
+    if args.archive and args.mode == 'steady-state':
+        parser.error("--archive is only supported with --mode generational")
+
+    return args
+
+
+def run(args):
+    '''Run training with the given configuration.'''
+
+    # create population of models
+    population = Population(population_size=args.population_size, mutation_rate=args.mutation_rate, cache_size=args.policy_cache, encoder=args.encoder)
+
+    # multi-fidelity schedule: full cost level from run configuration
+    if args.multi_fidelity:
+        population.fidelity = FidelitySchedule()
+        population.fidelity.levels[-1].update({
+            'grid_height': args.grid_size,
+            'grid_width': args.grid_size,
+            'trials': args.trials
+        })
+
+    # resume or initialize
+    if args.resume:
+        population.load_checkpoint(args.resume)
+    else:
+        population.initialize()
+
+    # lineage archive of every generation
+    archive = None
+    if args.archive:
+        archive = LineageArchive(args.archive, population.population_size, population.population[0].parameter_count())
+
+        # resume: generations archived after the checkpoint are replayed, so drop them
+        if args.resume:
+            archive.truncate(population.generation)
+        elif archive.generations() > 0:
+            raise ValueError(f"{args.archive} already holds {archive.generations()} generations: remove it or use --resume")
+
+    # live viewer buffer: written without waiting on any reader
+    publisher = None
+    if args.monitor:
+        publisher = MonitorPublisher(args.monitor)
+
+    def publish(population):
+        '''Publish statistics and the fittest model's best game.'''
+        publisher.publish_statistics(population)
+        fittest_model = max(population.population, key=lambda md: md.fitness)
+        best_trial = max(fittest_model.information, key=lambda trial_info: trial_info['fitness'])
+        publisher.publish_game(fittest_model, best_trial, population.generation)
+
+    def report_champion(population):
+        '''Score the fittest model on held-out games.'''
+        fittest_model = max(population.population, key=lambda md: md.fitness)
+        statistics = evaluate_champion(fittest_model, args.champion_games, args.grid_size, args.grid_size)
+        low, high = statistics['confidence_interval']
+        print(f"Champion held-out score: {statistics['mean']:.3f} (95% CI {low:.3f} to {high:.3f}, median {statistics['quantiles'][50]}, {statistics['games']} games)")
+
+    # worker pool: only spawned when requested
+    executor = None
+    chunksize = 1
+    if args.workers > 1:
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+        chunksize = max(1, args.population_size // (4 * args.workers))
+
+    def on_generation(population):
+        '''Report, display and checkpoint at each steady-state generation equivalent.'''
+        population.print_population_statistics()
+        if args.champion_games:
+            report_champion(population)
+        if publisher is not None:
+            publish(population)
+        if args.display_every and population.generation % args.display_every == 0:
+            population.display_fittest()
+        if args.checkpoint_every and population.generation % args.checkpoint_every == 0:
+            population.save_checkpoint(args.checkpoint_path)
+
+    try:
+
+        # steady-state: one child dispatched per completed evaluation
+        if args.mode == 'steady-state':
+            population.evolve_steady_state(
+                evaluations=args.generations * args.population_size,
+                trials=args.trials,
+                grid_height=args.grid_size,
+                grid_width=args.grid_size,
+                selected_number=args.selected_number,
+                executor=executor,
+                in_flight=2 * args.workers,
+                on_generation=on_generation
+            )
+            return population
+
+        # for each generation
+        for gen in range(args.generations):
+
+            # compute fitness
+            population.compute_fitness(
+                trials=args.trials,
+                grid_height=args.grid_size,
+                grid_width=args.grid_size,
+                executor=executor,
+                chunksize=chunksize
+            )
+
+            # display stats
+            population.print_population_statistics()
+            if args.champion_games:
+                report_champion(population)
+
+            # archive evaluated generation
+            if archive is not None:
+                archive.append_generation(population.population, population.generation)
+
+            # publish to live viewer
+            if publisher is not None:
+                publish(population)
+
+            # display best performance: imports pygame on first use only
+            if args.display_every and gen % args.display_every == 0:
+                population.display_fittest()
+
+            # evolve new generation
+            population.evolve_population(selected_number=args.selected_number)
+
+            # save checkpoint
+            if args.checkpoint_every and population.generation % args.checkpoint_every == 0:
+                population.save_checkpoint(args.checkpoint_path)
+
+    finally:
+
+        # shutdown workers
+        if executor is not None:
+            executor.shutdown()
+        if publisher is not None:
+            publisher.close()
+
+    return population
+
+
+def main(argv=None):
+    '''Command line entry point.'''
+
+    args = parse_arguments(argv)
+
+    # run without profiling
+    if not args.profile:
+        run(args)
+        return
+
+    # run with profiling
+    profiler = cProfile.Profile()
+    profiler.enable()
+    run(args)
+    profiler.disable()
+
+    # print most expensive functions
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+'''Live viewer of a running trainer: python -m viewer MONITOR_PATH'''
+
+import argparse
+import time
+from monitor import MonitorReader, FrameSnake
+
+
+def attach(path, retry=1.0):
+    '''Attach to monitor buffer, waiting until the trainer has created it.'''
+    while True:
+        try:
+            return MonitorReader(path)
+        except (FileNotFoundError, ValueError):
+            time.sleep(retry)
+
+
+def main(argv=None):
+    '''Command line entry point.'''
+
+    parser = argparse.ArgumentParser(description="Watch the champion games of a running trainer.")
+    parser.add_argument('path', help="monitor file given to train.py --monitor")
+    parser.add_argument('--tick', type=int, default=10)
+    parser.add_argument('--latest', action='store_true', help="always show newest frame rather than playing frames in order")
+    args = parser.parse_args(argv)
+
+    # pygame only needed by the viewer
+    from display import Display
+
+    reader = attach(args.path)
+    display = None
+    grid = None
+
+    # loop
+    while display is None or display.running:
+
+        # trainer restarted: attach to new file
+        if reader.replaced():
+            reader.close()
+            reader = attach(args.path)
+
+        # report new statistics
+        for record in reader.new_statistics():
+            print(f"Generation {record['generation']}: best {record['best']:.3f}, mean {record['mean']:.3f}, steps {record['simulated_steps']}")
+
+        # next frame
+        frame = reader.latest_frame() if args.latest else reader.next_frame()
+
+        if frame is not None:
+
+            # (re)create display when grid size changes
+            snake = FrameSnake(frame)
+            if (snake.grid_height, snake.grid_width) != grid:
+                if display is not None:
+                    display.quit()
+                grid = (snake.grid_height, snake.grid_width)
+                display = Display(snake.grid_height, snake.grid_width, tick=args.tick)
+
+            # full redraw: frames may be skipped
+            display.draw_initial_snake(snake)
+
+        # handle events
+        if display is not None:
+            display.event_handler()
+        else:
+            time.sleep(1 / args.tick)
+
+    # close display, detach
+    display.quit()
+    reader.close()
+
+
+if __name__ == '__main__':
+    main()